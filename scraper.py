@@ -7,15 +7,27 @@ Supports both SQLite (local dev) and PostgreSQL (Render production).
 """
 
 import feedparser
+import html
 import sqlite3
-import hashlib
 import re
 import os
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+import xml.etree.ElementTree as ET
+from collections import defaultdict
+from contextlib import contextmanager
+from email.utils import parsedate
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from time import monotonic
 
 # ── Postgres support (optional — only used when DATABASE_URL is set) ──────────
 try:
     import psycopg2
+    from psycopg2.extras import execute_batch, execute_values
+    from psycopg2.pool import ThreadedConnectionPool
     DATABASE_URL = os.environ.get("DATABASE_URL", "")
     USE_POSTGRES = bool(DATABASE_URL)
 except ImportError:
@@ -24,14 +36,67 @@ except ImportError:
 
 DB_FILE = "news.db"
 MAX_ARTICLES_PER_SOURCE = 30
+CLASSIFY_MAX_CHARS = 4096  # keywords past the lead never change the verdict
+MAX_SUMMARY_CHARS = 10000  # some feeds ship whole articles as the summary
+MAX_FETCH_WORKERS = 12
+MAX_FETCHES_PER_HOST = 2  # several feeds share a host (BBC, Reuters, Guardian)
+FETCH_TIMEOUT = 20  # seconds per feed download
 
 # ─────────────────────────────────────────────────────────────────────────────
 #  DATABASE CONNECTION
 # ─────────────────────────────────────────────────────────────────────────────
+# Postgres connections are pooled — each psycopg2.connect is a full
+# TCP+TLS+auth handshake, and the scraper/server together open dozens per
+# run. Built lazily on first use so importing the module never needs the
+# database to be up.
+_pg_pool      = None
+_pg_pool_lock = threading.Lock()
+
+
+def _get_pg_pool():
+    global _pg_pool
+    if _pg_pool is None:
+        with _pg_pool_lock:
+            if _pg_pool is None:
+                # Sized above the server's 8 request threads per worker
+                # plus the background scrape/recategorize/scheduler jobs —
+                # getconn() raises rather than blocks when the pool is dry
+                _pg_pool = ThreadedConnectionPool(1, 16, DATABASE_URL)
+    return _pg_pool
+
+
 def get_connection():
     if USE_POSTGRES:
-        return psycopg2.connect(DATABASE_URL)
-    return sqlite3.connect(DB_FILE)
+        return _get_pg_pool().getconn()
+    conn = sqlite3.connect(DB_FILE)
+    # WAL appends once per commit instead of fsyncing twice (rollback journal),
+    # and lets the web server keep reading while a scrape is writing.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-20000")
+    conn.execute("PRAGMA mmap_size=268435456")
+    return conn
+
+
+def release_connection(conn):
+    """Return a connection obtained from get_connection(). Pooled (kept
+    open) on Postgres, closed on SQLite where connects are cheap."""
+    if USE_POSTGRES:
+        _get_pg_pool().putconn(conn)
+    else:
+        conn.close()
+
+
+@contextmanager
+def db_connection():
+    """Connection scope that releases on every exit path — a query that
+    raises must not leak a pool slot."""
+    conn = get_connection()
+    try:
+        yield conn
+    finally:
+        release_connection(conn)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -118,7 +183,7 @@ FEEDS = {
 }
 
 # Sources where ALL articles are kept (no keyword filter needed)
-ALWAYS_INCLUDE_SOURCES = {
+ALWAYS_INCLUDE_SOURCES = frozenset({
     "The Guardian Women",
     "Ms. Magazine",
     "Feministing",
@@ -134,31 +199,45 @@ ALWAYS_INCLUDE_SOURCES = {
     "Them",
     "Queerty",
     "Xtra Magazine",
-}
+})
 
 # German sources where ALL articles are kept
-DE_ALWAYS_INCLUDE_SOURCES = {
+DE_ALWAYS_INCLUDE_SOURCES = frozenset({
     "queer.de",           # LGBTQIA+ specialist
     "Missy Magazine",     # feminist specialist
     "CORRECTIV",          # investigative — high signal-to-noise
     "netzpolitik.org",    # digital rights — all articles structurally relevant
-}
+})
+
+# Both locales combined — checked once per entry, so build the union once
+ALL_ALWAYS_INCLUDE_SOURCES = ALWAYS_INCLUDE_SOURCES | DE_ALWAYS_INCLUDE_SOURCES
 
-LGBTQIA_SOURCES = {
+LGBTQIA_SOURCES = frozenset({
     "Gay Times", "PinkNews", "Out Magazine", "LGBTQ Nation", "Advocate",
     "Autostraddle", "Them", "Queerty", "Xtra Magazine",
-}
+})
 
-FEMINIST_SOURCES = {
+FEMINIST_SOURCES = frozenset({
     "Ms. Magazine", "Feministing", "Jezebel", "Refinery29 Feminism",
     "The Guardian Women", "The Funambulist",
-}
+})
 
-DE_LGBTQIA_SOURCES = {"queer.de"}
-DE_FEMINIST_SOURCES = {"Missy Magazine"}
+DE_LGBTQIA_SOURCES = frozenset({"queer.de"})
+DE_FEMINIST_SOURCES = frozenset({"Missy Magazine"})
 
 # Sources that are paywalled at the source level
-PAYWALLED_SOURCES = {"New York Times", "Financial Times", "Washington Post"}
+PAYWALLED_SOURCES = frozenset({"New York Times", "Financial Times", "Washington Post"})
+
+# Per-source facts the scrape loop needs, derived once from the tables
+# above — one dict lookup per source instead of re-deriving them per feed
+SOURCE_META = {
+    name: {
+        "country":     info["country"],
+        "locale":      info.get("locale", "en"),
+        "always_keep": name in ALL_ALWAYS_INCLUDE_SOURCES,
+    }
+    for name, info in FEEDS.items()
+}
 
 # Phrases that signal a paywalled article in RSS content
 PAYWALL_SIGNAL_PHRASES = [
@@ -681,6 +760,201 @@ SOURCE_DEFAULT_TOPIC_DE = {
 }
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+#  IDENTITY TAG KEYWORDS  (women / lgbtqia+ detection, per locale)
+# ─────────────────────────────────────────────────────────────────────────────
+WOMEN_TERMS = [
+    "women", "woman", "girl", "girls", "female", "feminine", "feminism",
+    "feminist", "gender", "reproductive", "abortion", "maternity",
+    "maternal", "sexism", "misogyny", "patriarchy", "period poverty",
+    "menstrual", "domestic violence", "sexual harassment", "metoo",
+    "me too", "femicide",
+]
+
+LGBTQ_TERMS = [
+    "lgbt", "lgbtq", "lgbtqia", "queer", "gay", "lesbian", "bisexual",
+    "transgender", "trans ", "nonbinary", "non-binary", "intersex",
+    "asexual", "pansexual", "pride", "drag", "same-sex", "homophobia",
+    "transphobia", "biphobia", "conversion therapy", "gender affirming",
+    "pronouns", "two-spirit", "marriage equality",
+]
+
+WOMEN_TERMS_DE = [
+    "frauen", "frau", "mädchen", "weiblich", "feminismus", "feministisch",
+    "frauenrechte", "gleichstellung", "reproduktiv", "abtreibung",
+    "mutterschaft", "sexismus", "misogynie", "patriarchat",
+    "periodenarmut", "menstruation", "häusliche gewalt",
+    "sexuelle belästigung", "femizid", "geschlechtsspezifisch",
+]
+
+LGBTQ_TERMS_DE = [
+    "lgbt", "lgbtq", "lgbtqia", "queer", "schwul", "lesbisch",
+    "bisexuell", "transgender", "trans ", "nichtbinär", "nicht-binär",
+    "intergeschlechtlich", "asexuell", "pansexuell", "pride", "drag",
+    "gleichgeschlechtlich", "homophobie", "transphobie",
+    "konversionstherapie", "geschlechtsangleichung", "pronomen",
+]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  COMPILED KEYWORD MATCHERS
+#  One matcher per keyword bucket, built once at import. With pyahocorasick
+#  installed each bucket is an Aho-Corasick automaton — a single linear pass
+#  over the text regardless of keyword count. Without it, a compiled regex
+#  alternation (still one C-level scan per bucket).
+# ─────────────────────────────────────────────────────────────────────────────
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+def _compile_keywords(keywords):
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for kw in set(keywords):
+            automaton.add_word(kw, kw)
+        automaton.make_automaton()
+        return automaton
+    return re.compile("|".join(map(re.escape, keywords)))
+
+
+def _bucket_hit(matcher, text_lower):
+    """True if any keyword of the bucket occurs in the (lowercased) text."""
+    if ahocorasick is not None:
+        return next(matcher.iter(text_lower), None) is not None
+    return matcher.search(text_lower) is not None
+
+
+KEYWORDS_RE    = _compile_keywords(KEYWORDS)
+KEYWORDS_DE_RE = _compile_keywords(KEYWORDS_DE)
+
+WOMEN_RE    = _compile_keywords(WOMEN_TERMS)
+LGBTQ_RE    = _compile_keywords(LGBTQ_TERMS)
+WOMEN_RE_DE = _compile_keywords(WOMEN_TERMS_DE)
+LGBTQ_RE_DE = _compile_keywords(LGBTQ_TERMS_DE)
+
+PAYWALL_RE    = _compile_keywords(PAYWALL_SIGNAL_PHRASES)
+PAYWALL_RE_DE = _compile_keywords(PAYWALL_SIGNAL_PHRASES_DE)
+
+TOPIC_RES    = {name: _compile_keywords(kws) for name, kws in TOPIC_KEYWORDS.items()}
+TOPIC_RES_DE = {name: _compile_keywords(kws) for name, kws in TOPIC_KEYWORDS_DE.items()}
+
+
+def _build_classifier(gate_keywords, women_terms, lgbtq_terms, topic_keywords):
+    """Merge every bucket of one locale into a single automaton whose
+    payloads record which buckets each keyword belongs to, so one scan of
+    the text answers the inclusion gate, identity tags and topics at once.
+    Returns None without pyahocorasick (per-bucket matchers still work)."""
+    if ahocorasick is None:
+        return None
+    labels = defaultdict(set)
+    for kw in gate_keywords:
+        labels[kw].add(("gate", None))
+    for kw in women_terms:
+        labels[kw].add(("tag", "women"))
+    for kw in lgbtq_terms:
+        labels[kw].add(("tag", "lgbtqia+"))
+    for topic_name, kws in topic_keywords.items():
+        for kw in kws:
+            labels[kw].add(("topic", topic_name))
+    automaton = ahocorasick.Automaton()
+    for kw, kw_labels in labels.items():
+        automaton.add_word(kw, tuple(kw_labels))
+    automaton.make_automaton()
+    return automaton
+
+
+CLASSIFIER    = _build_classifier(KEYWORDS, WOMEN_TERMS, LGBTQ_TERMS, TOPIC_KEYWORDS)
+CLASSIFIER_DE = _build_classifier(KEYWORDS_DE, WOMEN_TERMS_DE, LGBTQ_TERMS_DE,
+                                  TOPIC_KEYWORDS_DE)
+
+# Topic output is ordered by taxonomy position (insertion order of the
+# TOPIC_KEYWORDS dicts), matching what the per-bucket path produces.
+_TOPIC_ORDER    = {name: i for i, name in enumerate(TOPIC_KEYWORDS)}
+_TOPIC_ORDER_DE = {name: i for i, name in enumerate(TOPIC_KEYWORDS_DE)}
+
+# Every canonical topic name, for the comma-tolerant filter parser below
+ALL_TOPIC_NAMES = (frozenset(TOPIC_KEYWORDS) | frozenset(TOPIC_KEYWORDS_DE)
+                   | frozenset(SOURCE_DEFAULT_TOPIC.values())
+                   | frozenset(SOURCE_DEFAULT_TOPIC_DE.values()))
+
+
+def parse_topic_param(raw):
+    """Split a multi-topic filter value into canonical topic names.
+
+    '|' is the unambiguous delimiter; a plain comma split is kept for
+    backward compatibility, but four of the canonical names themselves
+    contain ', ' ("Violence, Safety & Criminal Justice", ...), so comma
+    segments are greedily re-joined whenever the longest join forms a
+    known topic name. Unknown segments pass through as-is."""
+    raw = (raw or "").strip()
+    if not raw:
+        return []
+    if "|" in raw:
+        return [t.strip() for t in raw.split("|") if t.strip()]
+    if raw in ALL_TOPIC_NAMES:
+        return [raw]
+
+    parts = [t.strip() for t in raw.split(",") if t.strip()]
+    topics, i = [], 0
+    while i < len(parts):
+        match, span = parts[i], 1
+        for j in range(len(parts), i + 1, -1):
+            candidate = ", ".join(parts[i:j])
+            if candidate in ALL_TOPIC_NAMES:
+                match, span = candidate, j - i
+                break
+        topics.append(match)
+        i += span
+    return topics
+
+
+def classify_entry(text_lower, source, locale="en"):
+    """One-stop classification for an entry: returns
+    (passes_gate, identity_tags, system_topics).
+
+    With pyahocorasick installed all buckets are answered by a single
+    linear pass over the text; otherwise it delegates to the per-bucket
+    matchers. Source-based tags and default-topic fallbacks behave
+    exactly like get_identity_tags / get_system_topics."""
+    automaton = CLASSIFIER_DE if locale == "de" else CLASSIFIER
+    if automaton is None:
+        return (matches_keywords(text_lower, locale),
+                get_identity_tags(text_lower, source, locale),
+                get_system_topics(text_lower, source, locale))
+
+    gate_hit   = False
+    tag_hits   = set()
+    topic_hits = set()
+    for _, kw_labels in automaton.iter(text_lower):
+        for bucket, payload in kw_labels:
+            if bucket == "gate":
+                gate_hit = True
+            elif bucket == "tag":
+                tag_hits.add(payload)
+            else:
+                topic_hits.add(payload)
+
+    if locale == "de":
+        feminist_set, lgbtqia_set = DE_FEMINIST_SOURCES, DE_LGBTQIA_SOURCES
+        topic_order, fallback_map = _TOPIC_ORDER_DE, SOURCE_DEFAULT_TOPIC_DE
+    else:
+        feminist_set, lgbtqia_set = FEMINIST_SOURCES, LGBTQIA_SOURCES
+        topic_order, fallback_map = _TOPIC_ORDER, SOURCE_DEFAULT_TOPIC
+
+    if source in feminist_set:
+        tag_hits.add("women")
+    if source in lgbtqia_set:
+        tag_hits.add("lgbtqia+")
+
+    topics = sorted(topic_hits, key=topic_order.__getitem__)[:3]
+    if not topics and source in fallback_map:
+        topics = [fallback_map[source]]
+
+    return gate_hit, sorted(tag_hits), topics
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 #  DATABASE SETUP
 # ─────────────────────────────────────────────────────────────────────────────
@@ -693,9 +967,8 @@ def setup_database():
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS articles (
                 id               SERIAL PRIMARY KEY,
-                url_hash         TEXT UNIQUE,
                 title            TEXT,
-                link             TEXT,
+                link             TEXT    UNIQUE,
                 summary          TEXT,
                 source           TEXT,
                 country          TEXT    DEFAULT '',
@@ -706,7 +979,8 @@ def setup_database():
                 published_at     TEXT    DEFAULT '',
                 is_paywalled     BOOLEAN DEFAULT FALSE,
                 locale           TEXT    DEFAULT 'en',
-                paywall_override BOOLEAN DEFAULT NULL
+                paywall_override BOOLEAN DEFAULT NULL,
+                effective_at     TEXT    DEFAULT ''
             )
         """)
         conn.commit()
@@ -717,6 +991,17 @@ def setup_database():
             "ALTER TABLE articles ADD COLUMN IF NOT EXISTS is_paywalled BOOLEAN DEFAULT FALSE",
             "ALTER TABLE articles ADD COLUMN IF NOT EXISTS locale TEXT DEFAULT 'en'",
             "ALTER TABLE articles ADD COLUMN IF NOT EXISTS paywall_override BOOLEAN DEFAULT NULL",
+            "ALTER TABLE articles ADD COLUMN IF NOT EXISTS effective_at TEXT DEFAULT ''",
+            # link is now the dedup key; url_hash was redundant with it
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_articles_link ON articles (link)",
+            "ALTER TABLE articles DROP COLUMN IF EXISTS url_hash",
+            # Trigram GIN indexes serve the unanchored ILIKE '%...%'
+            # search patterns that would otherwise seq-scan every request
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+            "CREATE INDEX IF NOT EXISTS idx_articles_title_trgm"
+            " ON articles USING gin (title gin_trgm_ops)",
+            "CREATE INDEX IF NOT EXISTS idx_articles_summary_trgm"
+            " ON articles USING gin (summary gin_trgm_ops)",
         ]:
             try:
                 cursor.execute(col_sql)
@@ -729,9 +1014,8 @@ def setup_database():
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS articles (
                 id               INTEGER PRIMARY KEY AUTOINCREMENT,
-                url_hash         TEXT UNIQUE,
                 title            TEXT,
-                link             TEXT,
+                link             TEXT    UNIQUE,
                 summary          TEXT,
                 source           TEXT,
                 country          TEXT    DEFAULT '',
@@ -742,7 +1026,8 @@ def setup_database():
                 published_at     TEXT    DEFAULT '',
                 is_paywalled     INTEGER DEFAULT 0,
                 locale           TEXT    DEFAULT 'en',
-                paywall_override INTEGER DEFAULT NULL
+                paywall_override INTEGER DEFAULT NULL,
+                effective_at     TEXT    DEFAULT ''
             )
         """)
         for col, default in [
@@ -752,35 +1037,252 @@ def setup_database():
             ("is_paywalled",     "0"),
             ("locale",           "'en'"),
             ("paywall_override", "NULL"),
+            ("effective_at",     "''"),
         ]:
             try:
                 cursor.execute(f"ALTER TABLE articles ADD COLUMN {col} TEXT DEFAULT {default}")
             except sqlite3.OperationalError:
                 pass
+        # Dedup now keys on link directly. Legacy DBs keep their url_hash
+        # column (SQLite can't drop a UNIQUE column in place); new rows just
+        # leave it NULL.
+        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_articles_link ON articles (link)")
+        conn.commit()
+
+        # Full-text search over title/summary — LIKE '%x%' scans the whole
+        # table, FTS5 walks an inverted index. External-content table kept
+        # in sync by triggers; backfilled once if it's behind.
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                title, summary,
+                content=articles, content_rowid=id,
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS articles_fts_ai AFTER INSERT ON articles BEGIN
+                INSERT INTO articles_fts(rowid, title, summary)
+                VALUES (new.id, new.title, new.summary);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS articles_fts_ad AFTER DELETE ON articles BEGIN
+                INSERT INTO articles_fts(articles_fts, rowid, title, summary)
+                VALUES ('delete', old.id, old.title, old.summary);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS articles_fts_au AFTER UPDATE ON articles BEGIN
+                INSERT INTO articles_fts(articles_fts, rowid, title, summary)
+                VALUES ('delete', old.id, old.title, old.summary);
+                INSERT INTO articles_fts(rowid, title, summary)
+                VALUES (new.id, new.title, new.summary);
+            END
+        """)
+        cursor.execute("""
+            SELECT (SELECT COUNT(*) FROM articles) != (SELECT COUNT(*) FROM articles_fts)
+        """)
+        if cursor.fetchone()[0]:
+            cursor.execute("INSERT INTO articles_fts(articles_fts) VALUES ('rebuild')")
         conn.commit()
 
-    # Purge articles older than 180 days
-    cutoff = (datetime.now() - timedelta(days=180)).isoformat()
-    cursor.execute(f"DELETE FROM articles WHERE scraped_at < {ph}", [cutoff])
+    # Backfill effective_at (the article's display/sort date) for rows
+    # that predate the physical column; new rows set it at insert time
+    cursor.execute(
+        "UPDATE articles"
+        " SET effective_at = COALESCE(NULLIF(published_at, ''), scraped_at)"
+        " WHERE effective_at IS NULL OR effective_at = ''"
+    )
+    conn.commit()
+
+    # Junction tables: tags/topics normalized so filters can use an index
+    # instead of `LIKE '%...%'` substring scans. The comma-joined TEXT
+    # columns on articles stay — API payloads are built from them.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS article_topics (
+            article_id INTEGER,
+            topic      TEXT,
+            PRIMARY KEY (article_id, topic)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS article_tags (
+            article_id INTEGER,
+            tag        TEXT,
+            PRIMARY KEY (article_id, tag)
+        )
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_article_topics_topic ON article_topics (topic, article_id)")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_article_tags_tag ON article_tags (tag, article_id)")
+    conn.commit()
+
+    # Indexes for the filters get_all_articles builds (source / category /
+    # country equality, ORDER BY scraped_at DESC) — composite with the sort
+    # column, so a filtered page read walks LIMIT index entries in order
+    # instead of scanning and sorting the filtered set.
+    for index_sql in [
+        "CREATE INDEX IF NOT EXISTS idx_articles_scraped ON articles (scraped_at DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_articles_source_scraped ON articles (source, scraped_at DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_articles_category_scraped ON articles (category, scraped_at DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_articles_country_scraped ON articles (country, scraped_at DESC)",
+        # Partial indexes for free-content listings — paywalled rows never
+        # enter them, so they stay small and cache-hot. The predicate is
+        # the exact expression (with a literal, not a bind parameter) the
+        # free filters emit, or the planner cannot prove it and falls back
+        # to a full scan of idx_articles_scraped.
+        "CREATE INDEX IF NOT EXISTS idx_articles_fresh ON articles"
+        " (source, scraped_at DESC)"
+        " WHERE COALESCE(paywall_override, is_paywalled) = "
+        + ("FALSE" if USE_POSTGRES else "0"),
+        "CREATE INDEX IF NOT EXISTS idx_articles_free_scraped ON articles"
+        " (scraped_at DESC)"
+        " WHERE COALESCE(paywall_override, is_paywalled) = "
+        + ("FALSE" if USE_POSTGRES else "0"),
+        # Effective-date ordering per locale — matches /api/articles'
+        # filter + ORDER BY shape, so pages walk the index in order
+        # instead of sorting the filtered set
+        "CREATE INDEX IF NOT EXISTS idx_articles_locale_effective ON articles"
+        " (locale, effective_at DESC, id DESC)",
+    ]:
+        cursor.execute(index_sql)
+    if USE_POSTGRES:
+        # Partial per-locale variants keep the common-locale scans narrow
+        for locale_code in ("en", "de"):
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_articles_{locale_code}_effective"
+                " ON articles (effective_at DESC, id DESC)"
+                f" WHERE locale = '{locale_code}'"
+            )
+    conn.commit()
+
+    # Conditional-GET validators (ETag / Last-Modified) per feed, so
+    # unchanged feeds cost a 304 instead of a full download + parse.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS feed_cache (
+            source   TEXT PRIMARY KEY,
+            etag     TEXT DEFAULT '',
+            modified TEXT DEFAULT ''
+        )
+    """)
+    conn.commit()
+
+    # Materialized per-locale stats, refreshed by the writers — /api/stats
+    # reads one row instead of aggregating the articles table per request.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS article_stats (
+            locale       TEXT PRIMARY KEY,
+            total        INTEGER DEFAULT 0,
+            lgbtq        INTEGER DEFAULT 0,
+            women        INTEGER DEFAULT 0,
+            last_scraped TEXT
+        )
+    """)
+    conn.commit()
+
+    # Lookup side tables for /api/sources and /api/countries, upserted by
+    # the scrape loop — the endpoints read an index-ordered list instead
+    # of DISTINCT-scanning articles. Backfilled here for existing DBs.
+    cursor.execute("CREATE TABLE IF NOT EXISTS sources (name TEXT PRIMARY KEY)")
+    cursor.execute("CREATE TABLE IF NOT EXISTS countries (name TEXT PRIMARY KEY)")
+    verb     = "INSERT" if USE_POSTGRES else "INSERT OR IGNORE"
+    conflict = " ON CONFLICT DO NOTHING" if USE_POSTGRES else ""
+    cursor.execute(
+        f"{verb} INTO sources SELECT DISTINCT source FROM articles{conflict}")
+    cursor.execute(
+        f"{verb} INTO countries SELECT DISTINCT country FROM articles"
+        f" WHERE country != ''{conflict}")
     conn.commit()
-    conn.close()
+
+    conn.commit()
+    release_connection(conn)
+
+    purge_old_articles()
     print("✅ Database ready.", flush=True)
 
 
+PURGE_BATCH_SIZE = 1000
+
+
+def purge_old_articles(days=180):
+    """Delete articles older than `days` (and their junction rows).
+
+    Deletes run in batches of PURGE_BATCH_SIZE with a commit after each,
+    so the purge never holds the SQLite writer lock (or a long Postgres
+    transaction) for the whole sweep — readers and the next scrape can
+    interleave between batches. Returns the number of rows purged."""
+    conn   = get_connection()
+    cursor = conn.cursor()
+    ph     = "%s" if USE_POSTGRES else "?"
+    cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+
+    purged = 0
+    while True:
+        cursor.execute(f"""
+            DELETE FROM articles WHERE id IN (
+                SELECT id FROM articles WHERE scraped_at < {ph}
+                ORDER BY id LIMIT {PURGE_BATCH_SIZE}
+            )
+        """, [cutoff])
+        deleted = cursor.rowcount
+        conn.commit()
+        if deleted <= 0:
+            break
+        purged += deleted
+
+    if purged:
+        cursor.execute("DELETE FROM article_topics WHERE article_id NOT IN (SELECT id FROM articles)")
+        cursor.execute("DELETE FROM article_tags WHERE article_id NOT IN (SELECT id FROM articles)")
+        conn.commit()
+        print(f"🧹 Purged {purged} articles older than {days} days.", flush=True)
+
+    release_connection(conn)
+    return purged
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 #  HELPERS
 # ─────────────────────────────────────────────────────────────────────────────
-def url_hash(url):
-    return hashlib.md5(url.encode()).hexdigest()
+ARTICLE_COLUMNS = (
+    "title", "link", "summary", "source", "country",
+    "category", "tags", "topics", "scraped_at", "published_at",
+    "is_paywalled", "locale", "effective_at",
+)
+
+# Invariant INSERT statements, built once instead of per scrape
+INSERT_SQL_PG = (
+    f"INSERT INTO articles ({', '.join(ARTICLE_COLUMNS)}) VALUES %s"
+    " ON CONFLICT (link) DO NOTHING"
+)
+INSERT_SQL_SQLITE = (
+    f"INSERT OR IGNORE INTO articles ({', '.join(ARTICLE_COLUMNS)})"
+    f" VALUES ({','.join('?' * len(ARTICLE_COLUMNS))})"
+)
+
+
+def insert_junction_rows(cursor, table, rows):
+    """Insert (article_id, value) pairs into a junction table, skipping dupes."""
+    if not rows:
+        return
+    if USE_POSTGRES:
+        execute_values(cursor, f"INSERT INTO {table} VALUES %s ON CONFLICT DO NOTHING", rows)
+    else:
+        cursor.executemany(f"INSERT OR IGNORE INTO {table} VALUES (?,?)", rows)
+
+
+_HTML_RE = re.compile(r'<[^>]+>')
 
 
 def strip_html(text):
-    return re.sub(r'<[^>]+>', '', text or '').strip()
+    """Drop markup and decode entities, so keyword matching sees
+    \"don't\" rather than \"don&#39;t\"."""
+    return html.unescape(_HTML_RE.sub('', text or '')).strip()
 
 
 def extract_published_at(entry) -> str:
     for attr in ("published_parsed", "updated_parsed"):
-        parsed = getattr(entry, attr, None)
+        parsed = entry.get(attr)
         if parsed:
             try:
                 return datetime(*parsed[:6]).isoformat()
@@ -799,15 +1301,13 @@ def detect_paywall(entry, source: str, locale: str = "en") -> bool:
     summary = strip_html(entry.get("summary", "") or "")
     combined = title + " " + summary.lower()
 
-    # Check locale-appropriate paywall phrases
-    phrases = PAYWALL_SIGNAL_PHRASES_DE if locale == "de" else PAYWALL_SIGNAL_PHRASES
-    for phrase in phrases:
-        if phrase in combined:
-            return True
+    # Check locale-appropriate paywall phrases — one compiled scan
+    paywall_re = PAYWALL_RE_DE if locale == "de" else PAYWALL_RE
+    if _bucket_hit(paywall_re, combined):
+        return True
 
     # Short-content heuristic (likely truncated behind paywall)
-    all_always_include = ALWAYS_INCLUDE_SOURCES | DE_ALWAYS_INCLUDE_SOURCES
-    if source not in all_always_include and 0 < len(summary.strip()) < 120:
+    if source not in ALL_ALWAYS_INCLUDE_SOURCES and 0 < len(summary.strip()) < 120:
         return True
 
     return False
@@ -816,83 +1316,45 @@ def detect_paywall(entry, source: str, locale: str = "en") -> bool:
 # ─────────────────────────────────────────────────────────────────────────────
 #  KEYWORD MATCHING
 # ─────────────────────────────────────────────────────────────────────────────
-def matches_keywords(title, summary, locale: str = "en"):
-    """Gate check: return True if this article is relevant to the feed."""
-    combined = (title + " " + summary).lower()
-    kw_list = KEYWORDS_DE if locale == "de" else KEYWORDS
-    return any(kw in combined for kw in kw_list)
+def matches_keywords(text_lower, locale: str = "en"):
+    """Gate check: return True if this article is relevant to the feed.
+    Expects the already-lowercased combined title+summary text."""
+    pattern = KEYWORDS_DE_RE if locale == "de" else KEYWORDS_RE
+    return _bucket_hit(pattern, text_lower)
 
 
-def get_identity_tags(text, source, locale: str = "en"):
-    """Return identity tags (women / lgbtqia+) based on text + source type."""
-    text_lower = text.lower()
+def get_identity_tags(text_lower, source, locale: str = "en"):
+    """Return identity tags (women / lgbtqia+) based on text + source type.
+    Expects already-lowercased text."""
     tags = set()
 
     if locale == "de":
-        women_terms = [
-            "frauen", "frau", "mädchen", "weiblich", "feminismus", "feministisch",
-            "frauenrechte", "gleichstellung", "reproduktiv", "abtreibung",
-            "mutterschaft", "sexismus", "misogynie", "patriarchat",
-            "periodenarmut", "menstruation", "häusliche gewalt",
-            "sexuelle belästigung", "femizid", "geschlechtsspezifisch",
-        ]
-        lgbtq_terms = [
-            "lgbt", "lgbtq", "lgbtqia", "queer", "schwul", "lesbisch",
-            "bisexuell", "transgender", "trans ", "nichtbinär", "nicht-binär",
-            "intergeschlechtlich", "asexuell", "pansexuell", "pride", "drag",
-            "gleichgeschlechtlich", "homophobie", "transphobie",
-            "konversionstherapie", "geschlechtsangleichung", "pronomen",
-        ]
+        women_re, lgbtq_re = WOMEN_RE_DE, LGBTQ_RE_DE
         feminist_set  = DE_FEMINIST_SOURCES
         lgbtqia_set   = DE_LGBTQIA_SOURCES
     else:
-        women_terms = [
-            "women", "woman", "girl", "girls", "female", "feminine", "feminism",
-            "feminist", "gender", "reproductive", "abortion", "maternity",
-            "maternal", "sexism", "misogyny", "patriarchy", "period poverty",
-            "menstrual", "domestic violence", "sexual harassment", "metoo",
-            "me too", "femicide",
-        ]
-        lgbtq_terms = [
-            "lgbt", "lgbtq", "lgbtqia", "queer", "gay", "lesbian", "bisexual",
-            "transgender", "trans ", "nonbinary", "non-binary", "intersex",
-            "asexual", "pansexual", "pride", "drag", "same-sex", "homophobia",
-            "transphobia", "biphobia", "conversion therapy", "gender affirming",
-            "pronouns", "two-spirit", "marriage equality",
-        ]
+        women_re, lgbtq_re = WOMEN_RE, LGBTQ_RE
         feminist_set  = FEMINIST_SOURCES
         lgbtqia_set   = LGBTQIA_SOURCES
 
-    if source in feminist_set or any(t in text_lower for t in women_terms):
+    if source in feminist_set or _bucket_hit(women_re, text_lower):
         tags.add("women")
-    if source in lgbtqia_set or any(t in text_lower for t in lgbtq_terms):
+    if source in lgbtqia_set or _bucket_hit(lgbtq_re, text_lower):
         tags.add("lgbtqia+")
 
     return sorted(tags)
 
 
-def get_system_topics(text, source, locale: str = "en"):
+def get_system_topics(text_lower, source, locale: str = "en"):
     """
     Assign 1–3 primary system topic tags to an article.
+    Expects already-lowercased text.
     Returns an ordered list: strongest match first.
     Falls back to SOURCE_DEFAULT_TOPIC(_DE) if no keywords match.
     """
-    text_lower = text.lower()
-    matched = []
-
-    kw_map = TOPIC_KEYWORDS_DE if locale == "de" else TOPIC_KEYWORDS
-    for topic_name, keywords in kw_map.items():
-        if any(kw in text_lower for kw in keywords):
-            matched.append(topic_name)
-
-    # Deduplicate while preserving order
-    seen = set()
-    unique = []
-    for t in matched:
-        if t not in seen:
-            seen.add(t)
-            unique.append(t)
-    matched = unique[:3]  # cap at 3 system tags
+    topic_res = TOPIC_RES_DE if locale == "de" else TOPIC_RES
+    matched = [name for name, rx in topic_res.items() if _bucket_hit(rx, text_lower)]
+    matched = matched[:3]  # cap at 3 system tags
 
     # Fallback for always-include sources that matched no keyword
     if not matched:
@@ -906,177 +1368,505 @@ def get_system_topics(text, source, locale: str = "en"):
 # ─────────────────────────────────────────────────────────────────────────────
 #  SCRAPING
 # ─────────────────────────────────────────────────────────────────────────────
+_ATOM    = "{http://www.w3.org/2005/Atom}"
+_CONTENT = "{http://purl.org/rss/1.0/modules/content/}"
+
+
+def _atom_date(text):
+    """Parse an ISO-8601 Atom timestamp into a time-tuple, or None."""
+    try:
+        return datetime.fromisoformat(text.replace("Z", "+00:00")).timetuple()
+    except (ValueError, AttributeError):
+        return None
+
+
+def _parse_feed_fast(body):
+    """Parse well-formed RSS 2.0 / Atom with the C-accelerated ElementTree
+    instead of feedparser, which pays for its permissiveness on every feed.
+    Returns a list of entry dicts shaped like feedparser's (title / link /
+    summary / *_parsed), or None when the document needs feedparser's
+    tolerance (malformed XML, RDF/RSS 1.0, anything unrecognised)."""
+    try:
+        root = ET.fromstring(body)
+    except ET.ParseError:
+        return None
+
+    entries = []
+    if root.tag == "rss":
+        for item in root.iter("item"):
+            entry = {
+                "title":   item.findtext("title") or "",
+                "link":    (item.findtext("link") or "").strip(),
+                # Some feeds ship only content:encoded — feedparser falls
+                # back to it for the summary, so match that
+                "summary": (item.findtext("description")
+                            or item.findtext(_CONTENT + "encoded") or ""),
+            }
+            published = parsedate(item.findtext("pubDate") or "")
+            if published:
+                entry["published_parsed"] = published
+            entries.append(entry)
+    elif root.tag == _ATOM + "feed":
+        for item in root.iter(_ATOM + "entry"):
+            link = ""
+            for link_el in item.findall(_ATOM + "link"):
+                if link_el.get("rel", "alternate") == "alternate":
+                    link = link_el.get("href", "")
+                    break
+            entry = {
+                "title":   item.findtext(_ATOM + "title") or "",
+                "link":    link.strip(),
+                "summary": (item.findtext(_ATOM + "summary")
+                            or item.findtext(_ATOM + "content") or ""),
+            }
+            updated = _atom_date(item.findtext(_ATOM + "updated")
+                                 or item.findtext(_ATOM + "published"))
+            if updated:
+                entry["updated_parsed"] = updated
+            entries.append(entry)
+    else:
+        return None
+
+    return entries or None
+
+
+def fetch_feed(source_name, feed_info, etag="", modified="", host_sem=None):
+    """Download one feed and parse it from bytes. Runs in a worker thread —
+    no DB access here. Downloading ourselves (instead of letting feedparser
+    do it) separates network wait from parse work and gives us an explicit
+    per-feed timeout so a stalled server can't hang the whole scrape.
+
+    `host_sem` bounds concurrent downloads against one host — the feed list
+    has several BBC / Reuters / Guardian feeds, and hammering a single host
+    with the full worker pool invites 429s.
+
+    Sends the stored ETag / Last-Modified validators; on a 304 the feed is
+    unchanged and we return None instead of entries.
+    Returns (entries_or_None, etag, modified)."""
+    locale  = feed_info.get("locale", "en")
+    print(f"  📡 Scraping [{locale.upper()}]: {source_name}...", flush=True)
+    headers = {"User-Agent": feedparser.USER_AGENT}
+    if etag:
+        headers["If-None-Match"] = etag
+    if modified:
+        headers["If-Modified-Since"] = modified
+    request = urllib.request.Request(feed_info["url"], headers=headers)
+    try:
+        with host_sem or threading.Semaphore(1):
+            with urllib.request.urlopen(request, timeout=FETCH_TIMEOUT) as response:
+                body         = response.read()
+                new_etag     = response.headers.get("ETag", "") or ""
+                new_modified = response.headers.get("Last-Modified", "") or ""
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            print(f"     ⏭  Not modified: {source_name}", flush=True)
+            return None, etag, modified
+        raise
+    entries = _parse_feed_fast(body)
+    if entries is None:
+        entries = feedparser.parse(body).entries
+    return entries[:MAX_ARTICLES_PER_SOURCE], new_etag, new_modified
+
+
 def scrape_all_feeds():
     total_new = 0
     ph = "%s" if USE_POSTGRES else "?"
 
+    # Load conditional-GET validators saved by the previous run
+    conn   = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT source, etag, modified FROM feed_cache")
+    validators = {row[0]: (row[1] or "", row[2] or "") for row in cursor.fetchall()}
+
+    # Links already in the DB — most runs re-see mostly old articles, and a
+    # set probe here skips strip/classify work the insert would throw away.
+    cursor.execute("SELECT link FROM articles")
+    seen_links = {row[0] for row in cursor.fetchall()}
+    release_connection(conn)
+
+    # Phase 1 — fetch all feeds in parallel (network-bound, so threads overlap
+    # the per-feed round-trip latency instead of paying it serially).
+    fetched          = {}
+    validator_updates = []
+    host_sems = defaultdict(lambda: threading.Semaphore(MAX_FETCHES_PER_HOST))
+    with ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS) as pool:
+        futures = {}
+        for source_name, feed_info in FEEDS.items():
+            etag, modified = validators.get(source_name, ("", ""))
+            host   = urllib.parse.urlparse(feed_info["url"]).netloc
+            future = pool.submit(fetch_feed, source_name, feed_info,
+                                 etag, modified, host_sems[host])
+            futures[future] = source_name
+        for future in as_completed(futures):
+            source_name = futures[future]
+            try:
+                entries, etag, modified = future.result()
+                fetched[source_name] = entries
+                if etag or modified:
+                    validator_updates.append((source_name, etag, modified))
+            except Exception as e:
+                print(f"     ❌  Error scraping {source_name}: {e}", flush=True)
+                fetched[source_name] = []
+
+    # Persist fresh validators for the next run
+    if validator_updates:
+        conn   = get_connection()
+        cursor = conn.cursor()
+        if USE_POSTGRES:
+            execute_values(cursor, """
+                INSERT INTO feed_cache (source, etag, modified) VALUES %s
+                ON CONFLICT (source) DO UPDATE
+                  SET etag = EXCLUDED.etag, modified = EXCLUDED.modified
+            """, validator_updates)
+        else:
+            cursor.executemany(
+                "INSERT OR REPLACE INTO feed_cache (source, etag, modified) VALUES (?,?,?)",
+                validator_updates,
+            )
+        conn.commit()
+        release_connection(conn)
+
+    # Phase 2 — process entries and insert on the main thread
+    # (sqlite3 connections aren't thread-safe by default).
+    insert_sql = INSERT_SQL_PG if USE_POSTGRES else INSERT_SQL_SQLITE
+
+    # SQLite: one connection reused for the whole scrape — there is no
+    # server-side timeout to worry about, and reopening per source only
+    # resets the page cache. Postgres keeps a fresh connection per source.
+    shared_conn = None if USE_POSTGRES else get_connection()
+
     for source_name, feed_info in FEEDS.items():
-        feed_url = feed_info["url"]
-        country  = feed_info["country"]
-        locale   = feed_info.get("locale", "en")   # ← new: read locale from feed config
-        print(f"  📡 Scraping [{locale.upper()}]: {source_name}...", flush=True)
+        meta     = SOURCE_META[source_name]
+        country  = meta["country"]
+        locale   = meta["locale"]
 
-        conn   = get_connection()
+        conn   = get_connection() if USE_POSTGRES else shared_conn
         cursor = conn.cursor()
         new_count = 0
 
         try:
-            feed    = feedparser.parse(feed_url)
-            entries = feed.entries[:MAX_ARTICLES_PER_SOURCE]
+            entries    = fetched.get(source_name) or []   # None = 304 / unchanged
+            scraped_at = datetime.now().isoformat()   # one clock read per batch
+            rows       = []
+            entry_tags = {}   # link → (identity_tags, system_topics) for the junctions
+
+            # Constant for the whole source — decided once at import
+            always_keep = meta["always_keep"]
 
             for entry in entries:
-                link    = entry.get("link", "")
-                title   = strip_html(entry.get("title", "No title"))
-                summary = strip_html(entry.get("summary", ""))
-                hash_id = url_hash(link)
-
-                # Inclusion gate — locale-aware, skip for always-include sources
-                all_always_include = ALWAYS_INCLUDE_SOURCES | DE_ALWAYS_INCLUDE_SOURCES
-                always_keep = source_name in all_always_include
-                if not always_keep and not matches_keywords(title, summary, locale):
+                # `or` instead of .get defaults — feeds do ship explicit
+                # empty/None fields, which a default alone won't catch
+                link = entry.get("link") or ""
+                if link in seen_links:
                     continue
 
-                combined_text = title + " " + summary
+                title   = strip_html(entry.get("title") or "No title")
+
+                # feedparser tells us when a summary is already plain text
+                # — skip the tag regex and just decode entities
+                summary_raw  = entry.get("summary") or ""
+                summary_type = (entry.get("summary_detail") or {}).get("type", "")
+                if summary_type == "text/plain":
+                    summary = html.unescape(summary_raw).strip()[:MAX_SUMMARY_CHARS]
+                else:
+                    summary = strip_html(summary_raw)[:MAX_SUMMARY_CHARS]
+
+                # Lowercase the combined text once (bounded — a few feeds
+                # ship whole articles as summaries); one classifier pass
+                # answers gate + tags + topics — locale-aware throughout
+                combined_lower = (title + " " + summary)[:CLASSIFY_MAX_CHARS].lower()
+                gate_hit, identity_tags, system_topics = classify_entry(
+                    combined_lower, source_name, locale)
+
+                # Inclusion gate — skipped for always-include sources
+                if not always_keep and not gate_hit:
+                    continue
 
-                # Identity tags (women / lgbtqia+) — locale-aware
-                identity_tags = get_identity_tags(combined_text, source_name, locale)
-                tags_str = ", ".join(identity_tags) if identity_tags else "general"
+                tags_str   = ", ".join(identity_tags) if identity_tags else "general"
+                topics_str = ", ".join(system_topics) if system_topics else ""
 
                 # Category field (legacy — kept for backward compat)
                 category = "lgbtqia+" if "lgbtqia+" in identity_tags else "women"
 
-                # System topics (new taxonomy) — locale-aware
-                system_topics = get_system_topics(combined_text, source_name, locale)
-                topics_str = ", ".join(system_topics) if system_topics else ""
-
                 # Publication date + paywall — locale-aware
                 published_at = extract_published_at(entry)
                 is_paywalled = detect_paywall(entry, source_name, locale)
-                scraped_at   = datetime.now().isoformat()
-
-                try:
-                    cursor.execute(f"""
-                        INSERT INTO articles
-                          (url_hash, title, link, summary, source, country,
-                           category, tags, topics, scraped_at, published_at,
-                           is_paywalled, locale)
-                        VALUES ({ph},{ph},{ph},{ph},{ph},{ph},{ph},{ph},{ph},{ph},{ph},{ph},{ph})
-                    """, (
-                        hash_id, title, link, summary, source_name, country,
-                        category, tags_str, topics_str, scraped_at, published_at,
-                        is_paywalled,
-                        locale,
-                    ))
-                    new_count += 1
-                except Exception:
-                    if USE_POSTGRES:
-                        conn.rollback()
 
+                rows.append((
+                    title, link, summary, source_name, country,
+                    category, tags_str, topics_str, scraped_at, published_at,
+                    is_paywalled, locale, published_at or scraped_at,
+                ))
+                entry_tags[link] = (identity_tags, system_topics)
+                seen_links.add(link)   # also dedupes syndicated links across feeds
+
+            # One batched insert per source inside a single transaction —
+            # duplicates are skipped index-side by OR IGNORE / ON CONFLICT.
+            if rows:
+                if USE_POSTGRES:
+                    # execute_values folds the batch into one multi-row
+                    # INSERT — a single server round-trip per source.
+                    execute_values(cursor, insert_sql, rows, page_size=100)
+                    new_count = max(cursor.rowcount, 0)
+                else:
+                    # rowcount (sqlite3_changes) counts only rows this
+                    # statement inserted — a total_changes delta would also
+                    # count the FTS trigger's shadow-table writes
+                    cursor.executemany(insert_sql, rows)
+                    new_count = max(cursor.rowcount, 0)
+
+                # Mirror tags/topics into the junction tables
+                placeholders = ",".join([ph] * len(entry_tags))
+                cursor.execute(
+                    f"SELECT id, link FROM articles WHERE link IN ({placeholders})",
+                    list(entry_tags),
+                )
+                topic_rows, tag_rows = [], []
+                for article_id, link in cursor.fetchall():
+                    identity_tags, system_topics = entry_tags[link]
+                    topic_rows += [(article_id, t) for t in system_topics]
+                    tag_rows   += [(article_id, t) for t in identity_tags]
+                insert_junction_rows(cursor, "article_topics", topic_rows)
+                insert_junction_rows(cursor, "article_tags", tag_rows)
+
+                # Register the source/country in the lookup side tables
+                if USE_POSTGRES:
+                    name_upsert = "INSERT INTO {} (name) VALUES (%s) ON CONFLICT DO NOTHING"
+                else:
+                    name_upsert = "INSERT OR IGNORE INTO {} (name) VALUES (?)"
+                cursor.execute(name_upsert.format("sources"), [source_name])
+                if country:
+                    cursor.execute(name_upsert.format("countries"), [country])
             conn.commit()
             print(f"     ✔  {new_count} new articles from {source_name}", flush=True)
             total_new += new_count
 
         except Exception as e:
+            # Drop the half-written batch: on SQLite the connection is
+            # shared across sources, so without a rollback the next
+            # source's commit would persist these rows sans junctions.
+            conn.rollback()
             print(f"     ❌  Error scraping {source_name}: {e}", flush=True)
         finally:
-            conn.close()
+            if USE_POSTGRES:
+                release_connection(conn)
+
+    if shared_conn is not None:
+        shared_conn.close()
 
+    refresh_article_stats()
+    clear_articles_cache()
     print(f"\n🎉 Done! {total_new} new articles saved in total.", flush=True)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 #  RECATEGORIZE  — re-tag all existing articles with the new taxonomy
 # ─────────────────────────────────────────────────────────────────────────────
+RECAT_BATCH_SIZE = 1000
+
+
 def recategorize_all_articles():
-    """Re-run system topic + identity tag detection on every existing article."""
+    """Re-run system topic + identity tag detection on every existing article.
+
+    Rows stream in id-keyset batches of RECAT_BATCH_SIZE, each flushed as
+    one batched UPDATE plus its junction rows and committed, so memory and
+    transaction length stay bounded no matter how large the table grows."""
     conn   = get_connection()
     cursor = conn.cursor()
     ph     = "%s" if USE_POSTGRES else "?"
 
-    cursor.execute("SELECT id, title, summary, source, locale FROM articles")
-    rows    = cursor.fetchall()
+    update_sql = f"UPDATE articles SET topics = {ph}, tags = {ph} WHERE id = {ph}"
+
+    # Junction tables are rebuilt wholesale alongside the refreshed strings
+    cursor.execute("DELETE FROM article_topics")
+    cursor.execute("DELETE FROM article_tags")
+
     updated = 0
+    last_id = 0
+    while True:
+        cursor.execute(
+            f"""SELECT id, title, summary, source, locale FROM articles
+                WHERE id > {ph} ORDER BY id LIMIT {RECAT_BATCH_SIZE}""",
+            [last_id],
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            break
+
+        updates, topic_rows, tag_rows = [], [], []
+        for row in rows:
+            article_id, title, summary, source = row[0], row[1], row[2], row[3]
+            locale = row[4] if len(row) > 4 and row[4] else "en"
+            text_lower = ((title or "") + " " + (summary or ""))[:CLASSIFY_MAX_CHARS].lower()
+
+            # Tags + topics in one classifier pass — locale-aware
+            _, identity_tags, system_topics = classify_entry(text_lower, source, locale)
+            topics_str = ", ".join(system_topics) if system_topics else ""
+            tags_str   = ", ".join(identity_tags) if identity_tags else "general"
+
+            updates.append((topics_str, tags_str, article_id))
+            topic_rows += [(article_id, t) for t in system_topics]
+            tag_rows   += [(article_id, t) for t in identity_tags]
+
+        if USE_POSTGRES:
+            execute_batch(cursor, update_sql, updates, page_size=RECAT_BATCH_SIZE)
+        else:
+            cursor.executemany(update_sql, updates)
+        insert_junction_rows(cursor, "article_topics", topic_rows)
+        insert_junction_rows(cursor, "article_tags", tag_rows)
+        conn.commit()
 
-    for row in rows:
-        article_id, title, summary, source = row[0], row[1], row[2], row[3]
-        locale = row[4] if len(row) > 4 and row[4] else "en"
-        text = (title or "") + " " + (summary or "")
+        updated += len(rows)
+        last_id  = rows[-1][0]
 
-        # New system topics — locale-aware
-        system_topics = get_system_topics(text, source, locale)
-        topics_str = ", ".join(system_topics) if system_topics else ""
+    conn.commit()   # covers the junction DELETEs when the table was empty
+    release_connection(conn)
+    refresh_article_stats()
+    clear_articles_cache()
+    print(f"✅ Recategorized {updated} articles with new taxonomy.", flush=True)
 
-        # Identity tags — locale-aware
-        identity_tags = get_identity_tags(text, source, locale)
-        tags_str = ", ".join(identity_tags) if identity_tags else "general"
 
-        cursor.execute(
-            f"UPDATE articles SET topics = {ph}, tags = {ph} WHERE id = {ph}",
-            (topics_str, tags_str, article_id)
-        )
-        updated += 1
+def refresh_article_stats():
+    """Recompute the per-locale rows in article_stats.
 
+    One GROUP BY pass over the table, run by the writers (scrape and
+    recategorize), keeps the stats endpoint at a single-row read."""
+    conn   = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT locale, COUNT(*),
+               SUM(CASE WHEN tags LIKE '%lgbtqia+%' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN tags LIKE '%women%' THEN 1 ELSE 0 END),
+               MAX(scraped_at)
+        FROM articles GROUP BY locale
+    """)
+    stats_rows = cursor.fetchall()
+    if USE_POSTGRES:
+        upsert = (
+            "INSERT INTO article_stats (locale, total, lgbtq, women, last_scraped)"
+            " VALUES (%s, %s, %s, %s, %s)"
+            " ON CONFLICT (locale) DO UPDATE SET"
+            " total = EXCLUDED.total, lgbtq = EXCLUDED.lgbtq,"
+            " women = EXCLUDED.women, last_scraped = EXCLUDED.last_scraped"
+        )
+    else:
+        upsert = (
+            "INSERT OR REPLACE INTO article_stats"
+            " (locale, total, lgbtq, women, last_scraped)"
+            " VALUES (?, ?, ?, ?, ?)"
+        )
+    cursor.executemany(upsert, stats_rows)
     conn.commit()
-    conn.close()
-    print(f"✅ Recategorized {updated} articles with new taxonomy.", flush=True)
+    release_connection(conn)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 #  QUERY (kept for backward compatibility / standalone use)
 # ─────────────────────────────────────────────────────────────────────────────
+# Frontends re-request the same few filter combinations far more often
+# than the data changes; a short-TTL cache keyed on the filter tuple
+# answers those repeats without touching the database. Writers clear it.
+_ARTICLES_CACHE     = {}
+_ARTICLES_CACHE_TTL = 60   # seconds
+_ARTICLES_CACHE_MAX = 256  # distinct filter combinations
+
+
+def clear_articles_cache():
+    _ARTICLES_CACHE.clear()
+
+
 def get_all_articles(category=None, source=None, search=None, topic=None,
                      country=None, time_range=None, date_to=None,
-                     limit=200, free_only=False):
+                     limit=200, free_only=False, before=None):
+    cache_key = (category, source, search, topic, country,
+                 time_range, date_to, limit, free_only, before)
+    cached = _ARTICLES_CACHE.get(cache_key)
+    if cached is not None and monotonic() - cached[0] < _ARTICLES_CACHE_TTL:
+        return list(cached[1])
+
     conn   = get_connection()
     ph     = "%s" if USE_POSTGRES else "?"
 
     if not USE_POSTGRES:
         conn.row_factory = sqlite3.Row
 
-    cursor = conn.cursor()
-    query  = "SELECT * FROM articles WHERE 1=1"
-    params = []
+    cursor  = conn.cursor()
+    # Collected as a list and joined once — and every user value stays in
+    # params, which keeps the clause assembly easy to audit.
+    clauses = []
+    params  = []
 
     if category:
-        query += f" AND (category = {ph} OR tags LIKE {ph})"
-        params += [category, f"%{category}%"]
+        clauses.append(f"(category = {ph} OR id IN "
+                       f"(SELECT article_id FROM article_tags WHERE tag = {ph}))")
+        params += [category, category]
     if source:
-        query += f" AND source = {ph}"
+        clauses.append(f"source = {ph}")
         params.append(source)
     if country:
-        query += f" AND country = {ph}"
+        clauses.append(f"country = {ph}")
         params.append(country)
     if search:
-        query += f" AND (title LIKE {ph} OR summary LIKE {ph})"
-        params += [f"%{search}%", f"%{search}%"]
+        if USE_POSTGRES:
+            # ILIKE (not LOWER(col) LIKE) so the pg_trgm GIN indexes apply;
+            # patterns under 3 chars can't use trigrams and seq-scan, but
+            # they still filter — dropping the clause would return everything
+            clauses.append(f"(title ILIKE {ph} OR summary ILIKE {ph})")
+            params += [f"%{search}%", f"%{search}%"]
+        else:
+            # FTS5 phrase-prefix query; quoting neutralises MATCH operators
+            clauses.append("id IN (SELECT rowid FROM articles_fts"
+                           " WHERE articles_fts MATCH ?)")
+            params.append('"' + search.replace('"', ' ') + '"*')
     if topic:
-        topic_list    = [t.strip() for t in topic.split(",")]
-        topic_clauses = " OR ".join([f"topics LIKE {ph}" for _ in topic_list])
-        query        += f" AND ({topic_clauses})"
-        params       += [f"%{t}%" for t in topic_list]
+        topic_list = parse_topic_param(topic)
+        if topic_list:
+            placeholders = ",".join([ph] * len(topic_list))
+            clauses.append(f"id IN (SELECT article_id FROM article_topics"
+                           f" WHERE topic IN ({placeholders}))")
+            params += topic_list
     if time_range:
-        query += f" AND scraped_at >= {ph}"
+        clauses.append(f"scraped_at >= {ph}")
         params.append(time_range)
     if date_to:
-        query += f" AND scraped_at <= {ph}"
+        clauses.append(f"scraped_at <= {ph}")
         params.append(date_to)
+    if before:
+        # Keyset pagination: pass the scraped_at of the last row seen and
+        # each page becomes an index range scan, with no OFFSET walk
+        clauses.append(f"scraped_at < {ph}")
+        params.append(before)
     if free_only:
-        query += f" AND COALESCE(paywall_override, is_paywalled) = {ph}"
-        params.append(False if USE_POSTGRES else 0)
-
-    query += f" ORDER BY scraped_at DESC LIMIT {ph}"
+        # Literal, not a bind parameter — it must textually match the
+        # partial-index predicate for the planner to use the index
+        clauses.append("COALESCE(paywall_override, is_paywalled) = "
+                       + ("FALSE" if USE_POSTGRES else "0"))
+
+    # Explicit projection — SELECT * would also ship columns no caller
+    # reads (e.g. the legacy url_hash still present in older SQLite DBs).
+    query = ("SELECT id, title, link, summary, source, country, category,"
+             " tags, topics, scraped_at, published_at, is_paywalled,"
+             " paywall_override, locale FROM articles"
+             + (" WHERE " + " AND ".join(clauses) if clauses else "")
+             + f" ORDER BY scraped_at DESC LIMIT {ph}")
     params.append(limit)
 
     cursor.execute(query, params)
 
+    # Iterate the cursor directly — fetchall would materialise the raw
+    # row list first and the dicts second, doubling peak memory
     if USE_POSTGRES:
         cols = [desc[0] for desc in cursor.description]
-        rows = [dict(zip(cols, row)) for row in cursor.fetchall()]
+        rows = [dict(zip(cols, row)) for row in cursor]
     else:
-        rows = [dict(row) for row in cursor.fetchall()]
+        rows = list(map(dict, cursor))
+
+    release_connection(conn)
 
-    conn.close()
-    return rows
+    if len(_ARTICLES_CACHE) >= _ARTICLES_CACHE_MAX:
+        _ARTICLES_CACHE.clear()
+    _ARTICLES_CACHE[cache_key] = (monotonic(), rows)
+    return list(rows)
 
 
 if __name__ == "__main__":
@@ -4,16 +4,22 @@ Serves articles as JSON for your Lovable frontend (or any frontend).
 Run with: python server.py
 API available at: http://localhost:5000/api/articles
 """
+import base64
 import os
 import threading
 from flask import Flask, jsonify, request, send_from_directory
 from flask_cors import CORS
-from scraper import get_connection, setup_database, scrape_all_feeds, recategorize_all_articles, USE_POSTGRES
+from scraper import db_connection, setup_database, scrape_all_feeds, recategorize_all_articles, parse_topic_param, clear_articles_cache, USE_POSTGRES
 from datetime import datetime, timedelta, date
+from functools import lru_cache
+from time import monotonic, time
 from apscheduler.schedulers.background import BackgroundScheduler
 
 app = Flask(__name__, static_folder=".")
 CORS(app)
+# Skip key sorting and pretty-printing — smaller payloads, less CPU per response
+app.json.sort_keys = False
+app.json.compact = True
 
 # Admin secret for paywall override endpoint — set in Render environment variables
 ADMIN_SECRET = os.environ.get("ADMIN_SECRET", "")
@@ -34,59 +40,181 @@ TOPIC_META = {
     "Workplace & Economics":{"icon": "💼", "color": "#607D8B"},
 }
 
+# Column list for /api/articles, with a `p` prefix slot so the same text
+# serves the plain query ("") and the deferred-join outer query ("a.")
+ARTICLE_SELECT = (
+    "{p}id, {p}title, {p}link, {p}summary, {p}source, {p}country, "
+    "{p}category, {p}tags, {p}topics, {p}scraped_at, {p}published_at, "
+    "COALESCE({p}paywall_override, {p}is_paywalled) AS is_paywalled, "
+    "{p}locale"
+)
+
+# JSON keys for an /api/articles row, aligned with ARTICLE_SELECT; the
+# trailing effective_at column is dropped by the zip
+ARTICLE_KEYS = (
+    "id", "title", "link", "summary", "source", "country", "category",
+    "tags", "topics", "scraped_at", "published_at", "is_paywalled", "locale",
+)
+
+# Effective article date — a physical column set at insert time (and
+# backfilled by setup_database), so it is plain-index sortable with no
+# per-row COALESCE
+DATE_COL = "effective_at"
+
+_PH = "%s" if USE_POSTGRES else "?"
+
+
+@lru_cache(maxsize=256)
+def _articles_where(n_topics, n_sources, search_mode, has_today,
+                    has_from, has_to, paywall):
+    """WHERE clause for /api/articles, cached by filter shape.
+
+    Requests with the same combination of filters reuse the identical SQL
+    text, which also lets sqlite3's per-connection statement cache and the
+    Postgres plan cache hit instead of re-parsing a fresh string. The
+    caller appends bind parameters in the same order the clauses are
+    emitted here."""
+    ph = _PH
+    conditions = [f"locale = {ph}"]
+
+    # Topic filter — indexed equality on the junction table instead of
+    # a LIKE scan over the delimited topics column
+    if n_topics:
+        placeholders = ",".join([ph] * n_topics)
+        conditions.append(
+            f"id IN (SELECT article_id FROM article_topics"
+            f" WHERE topic IN ({placeholders}))"
+        )
+
+    if n_sources:
+        placeholders = ",".join([ph] * n_sources)
+        conditions.append(f"source IN ({placeholders})")
+
+    # Search — ILIKE over the pg_trgm GIN indexes on Postgres, FTS5 on SQLite
+    if search_mode == "ilike":
+        conditions.append(f"(title ILIKE {ph} OR summary ILIKE {ph})")
+    elif search_mode == "fts":
+        conditions.append("id IN (SELECT rowid FROM articles_fts"
+                          " WHERE articles_fts MATCH ?)")
+
+    if has_today:
+        conditions.append(f"{DATE_COL} >= {ph}")
+    if has_from:
+        conditions.append(f"{DATE_COL} >= {ph}")
+    if has_to:
+        conditions.append(f"{DATE_COL} < {ph}")
+
+    # Paywall filter — paywall_override takes priority over is_paywalled.
+    # Literal, not a bind parameter: the free value must textually match
+    # the partial-index predicate for the planner to use the index.
+    if paywall == "free":
+        conditions.append("COALESCE(paywall_override, is_paywalled) = "
+                          + ("FALSE" if USE_POSTGRES else "0"))
+    elif paywall == "paywalled":
+        conditions.append("COALESCE(paywall_override, is_paywalled) = "
+                          + ("TRUE" if USE_POSTGRES else "1"))
+
+    return "WHERE " + " AND ".join(conditions)
+
+# Short-TTL cache for endpoint results that only change when a scrape
+# runs — the topic counts, source/country lists and stats otherwise
+# re-scan the articles table on every page load.
+_API_CACHE = {}
+_API_CACHE_TTL = 60
+
+
+def _api_cache_get(key):
+    hit = _API_CACHE.get(key)
+    if hit and monotonic() - hit[1] < _API_CACHE_TTL:
+        return hit[0]
+    return None
+
+
+def _api_cache_set(key, value):
+    _API_CACHE[key] = (value, monotonic())
+    return value
+
+
+# Pagination counts are the priciest part of /api/articles — COUNT(*)
+# visits every matching row — and repeat for every page of the same
+# filter set, so they get their own short-TTL cache keyed by filter.
+_COUNT_CACHE     = {}
+_COUNT_CACHE_TTL = 30   # seconds
+_COUNT_CACHE_MAX = 512  # distinct filter combinations
+
+
+# Whole-response cache for /api/articles keyed by the raw query string —
+# clients re-request the same filter/page combinations far more often
+# than the data changes
+_ARTICLES_RESP_CACHE     = {}
+_ARTICLES_RESP_CACHE_TTL = 30   # seconds
+_ARTICLES_RESP_CACHE_MAX = 512  # distinct query strings
+
+
+def clear_api_cache():
+    """Drop cached endpoint results after a scrape/recategorize writes."""
+    _API_CACHE.clear()
+    _COUNT_CACHE.clear()
+    _ARTICLES_RESP_CACHE.clear()
+
+
+@lru_cache(maxsize=4)
+def _today_iso(minute_bucket):
+    # Memoized per minute — the day boundary for the time=today filter is
+    # on the hot path of /api/articles and only changes at midnight
+    return date.today().isoformat()
+
+
 # ── API Routes ────────────────────────────────────────────────────────────────
 
 @app.route("/api/articles")
 def articles():
+    qs  = request.query_string
+    hit = _ARTICLES_RESP_CACHE.get(qs)
+    if hit and monotonic() - hit[1] < _ARTICLES_RESP_CACHE_TTL:
+        return jsonify(hit[0])
+
     ph = "%s" if USE_POSTGRES else "?"
 
     locale       = request.args.get("locale", "en")
     limit        = min(int(request.args.get("limit", 30)), 200)
     offset       = max(int(request.args.get("offset", 0)), 0)
+    cursor_raw   = request.args.get("cursor", "")
+    want_total   = request.args.get("include_total", "1") != "0"
     search       = request.args.get("search", "").strip()
     time_r       = request.args.get("time", "")
     date_from    = request.args.get("date_from", "")
     date_to      = request.args.get("date_to", "")
     paywall      = request.args.get("paywall", "all")   # "all" | "free" | "paywalled"
 
-    # Comma-separated multi-value params
+    # Multi-value params — topics go through the comma-tolerant parser,
+    # since four canonical topic names themselves contain ', '
     topics_raw   = request.args.get("topics", "")
     sources_raw  = request.args.get("sources", "")
-    topics_list  = [t.strip() for t in topics_raw.split(",")  if t.strip()]
+    topics_list  = parse_topic_param(topics_raw)
     sources_list = [s.strip() for s in sources_raw.split(",") if s.strip()]
 
-    conditions = [f"locale = {ph}"]
-    params     = [locale]
-
-    # Topic filter (OR across list — each checked with LIKE)
-    if topics_list:
-        topic_clauses = " OR ".join([f"topics LIKE {ph}"] * len(topics_list))
-        conditions.append(f"({topic_clauses})")
-        for t in topics_list:
-            params.append(f"%{t}%")
-
-    # Source filter (OR across list)
-    if sources_list:
-        placeholders = ",".join([ph] * len(sources_list))
-        conditions.append(f"source IN ({placeholders})")
-        params.extend(sources_list)
+    # Bind parameters, appended in the order _articles_where emits clauses
+    params = [locale]
+    params.extend(topics_list)
+    params.extend(sources_list)
 
-    # Search (title + summary, case-insensitive)
+    # Short patterns can't use trigrams on Postgres and seq-scan, but they
+    # still filter — dropping the clause would return the whole listing
+    search_mode = ""
     if search:
-        conditions.append(f"(LOWER(title) LIKE {ph} OR LOWER(summary) LIKE {ph})")
-        q = f"%{search.lower()}%"
-        params += [q, q]
-
-    # Date filtering — computed in Python for SQLite + Postgres compatibility
-    date_col = "COALESCE(NULLIF(published_at, ''), scraped_at)"
+        if USE_POSTGRES:
+            search_mode = "ilike"
+            q = f"%{search}%"
+            params += [q, q]
+        else:
+            search_mode = "fts"
+            params.append('"' + search.replace('"', ' ') + '"*')
 
     if time_r == "today":
-        today_str = date.today().isoformat()
-        conditions.append(f"{date_col} >= {ph}")
-        params.append(today_str)
+        params.append(_today_iso(int(time() // 60)))
 
     if date_from:
-        conditions.append(f"{date_col} >= {ph}")
         params.append(date_from)
 
     if date_to:
@@ -94,103 +222,147 @@ def articles():
             dt_exclusive = (datetime.fromisoformat(date_to) + timedelta(days=1)).date().isoformat()
         except Exception:
             dt_exclusive = date_to
-        conditions.append(f"{date_col} < {ph}")
         params.append(dt_exclusive)
 
-    # Paywall filter — paywall_override takes priority over is_paywalled
-    if paywall == "free":
-        conditions.append(f"COALESCE(paywall_override, is_paywalled) = {ph}")
-        params.append(False if USE_POSTGRES else 0)
-    elif paywall == "paywalled":
-        conditions.append(f"COALESCE(paywall_override, is_paywalled) = {ph}")
-        params.append(True if USE_POSTGRES else 1)
-
-    where_clause = "WHERE " + " AND ".join(conditions)
-
-    conn   = get_connection()
-    cursor = conn.cursor()
-
-    # Total count for pagination
-    cursor.execute(f"SELECT COUNT(*) FROM articles {where_clause}", params)
-    total = cursor.fetchone()[0]
-
-    # Paginated results
-    cursor.execute(
-        f"""SELECT id, title, link, summary, source, country, category,
-                   tags, topics, scraped_at, published_at,
-                   COALESCE(paywall_override, is_paywalled) AS is_paywalled,
-                   locale
-            FROM articles
-            {where_clause}
-            ORDER BY {date_col} DESC
-            LIMIT {ph} OFFSET {ph}""",
-        params + [limit, offset]
+    # Keyset pagination — `cursor` is an opaque base64 "<date>|<id>" token
+    # from a previous response; each page becomes an index range scan
+    # instead of an O(offset) walk. OFFSET remains as the fallback.
+    cursor_after = None
+    if cursor_raw:
+        try:
+            cur_date, cur_id = base64.urlsafe_b64decode(
+                cursor_raw.encode()).decode().rsplit("|", 1)
+            cursor_after = (cur_date, int(cur_id))
+        except Exception:
+            cursor_after = None
+
+    date_col = DATE_COL
+    where_clause = _articles_where(
+        len(topics_list), len(sources_list), search_mode,
+        time_r == "today", bool(date_from), bool(date_to), paywall,
     )
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
 
+    with db_connection() as conn:
+        cursor = conn.cursor()
+
+        # Total count for pagination — taken before the keyset predicate so
+        # it reflects the whole filtered set, not the remainder of the walk.
+        # Skippable via include_total=0 and cached per filter combination,
+        # since the same total is re-requested for every page.
+        total = None
+        if want_total:
+            count_key = (where_clause, tuple(params))
+            hit = _COUNT_CACHE.get(count_key)
+            if hit and monotonic() - hit[1] < _COUNT_CACHE_TTL:
+                total = hit[0]
+            else:
+                cursor.execute(f"SELECT COUNT(*) FROM articles {where_clause}", params)
+                total = cursor.fetchone()[0]
+                if len(_COUNT_CACHE) >= _COUNT_CACHE_MAX:
+                    _COUNT_CACHE.clear()
+                _COUNT_CACHE[count_key] = (total, monotonic())
+
+        if cursor_after:
+            params.extend(cursor_after)
+            where_clause += f" AND ({date_col}, id) < ({ph}, {ph})"
+
+        # Paginated results — the trailing effective_at column only feeds
+        # the next_cursor token and is not part of the JSON rows
+        if cursor_after:
+            cursor.execute(
+                f"""SELECT {ARTICLE_SELECT.format(p="")}, {date_col} AS effective_at
+                    FROM articles
+                    {where_clause}
+                    ORDER BY {date_col} DESC, id DESC
+                    LIMIT {ph}""",
+                params + [limit]
+            )
+        else:
+            # Deferred join: the narrow inner query walks the OFFSET over
+            # ids only; wide columns are fetched just for the final page
+            date_col_a = "a.effective_at"
+            cursor.execute(
+                f"""SELECT {ARTICLE_SELECT.format(p="a.")}, {date_col_a} AS effective_at
+                    FROM articles a
+                    JOIN (SELECT id FROM articles
+                          {where_clause}
+                          ORDER BY {date_col} DESC, id DESC
+                          LIMIT {ph} OFFSET {ph}) p ON a.id = p.id
+                    ORDER BY {date_col_a} DESC, a.id DESC""",
+                params + [limit, offset]
+            )
+        rows = cursor.fetchall()
+        cursor.close()
+
+    next_cursor = None
+    if len(rows) == limit and rows:
+        last = rows[-1]
+        next_cursor = base64.urlsafe_b64encode(
+            f"{last[13]}|{last[0]}".encode()).decode()
+
+    # One C-level zip per row instead of 13 interpreted dict inserts
     articles_list = []
     for row in rows:
-        articles_list.append({
-            "id":           row[0],
-            "title":        row[1],
-            "link":         row[2],
-            "summary":      row[3],
-            "source":       row[4],
-            "country":      row[5],
-            "category":     row[6],
-            "tags":         row[7],
-            "topics":       row[8],
-            "scraped_at":   row[9],
-            "published_at": row[10],
-            "is_paywalled": bool(row[11]) if row[11] is not None else False,
-            "locale":       row[12] if row[12] is not None else "en",
-        })
+        item = dict(zip(ARTICLE_KEYS, row))
+        item["is_paywalled"] = bool(item["is_paywalled"]) if item["is_paywalled"] is not None else False
+        item["locale"] = item["locale"] or "en"
+        articles_list.append(item)
 
-    return jsonify({"articles": articles_list, "total": total})
+    payload = {"articles": articles_list, "total": total,
+               "next_cursor": next_cursor}
+    if len(_ARTICLES_RESP_CACHE) >= _ARTICLES_RESP_CACHE_MAX:
+        _ARTICLES_RESP_CACHE.clear()
+    _ARTICLES_RESP_CACHE[qs] = (payload, monotonic())
+    return jsonify(payload)
 
 
 @app.route("/api/sources")
 def sources():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT DISTINCT source FROM articles ORDER BY source")
-    result = [row[0] for row in cursor.fetchall()]
-    conn.close()
+    result = _api_cache_get("sources")
+    if result is None:
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT name FROM sources ORDER BY name")
+            result = [row[0] for row in cursor.fetchall()]
+        _api_cache_set("sources", result)
     return jsonify(result)
 
 
 @app.route("/api/countries")
 def countries():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT DISTINCT country FROM articles WHERE country != '' ORDER BY country")
-    result = [row[0] for row in cursor.fetchall()]
-    conn.close()
+    result = _api_cache_get("countries")
+    if result is None:
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT name FROM countries ORDER BY name")
+            result = [row[0] for row in cursor.fetchall()]
+        _api_cache_set("countries", result)
     return jsonify(result)
 
 
 @app.route("/api/topics")
 def topics():
-    ph = "%s" if USE_POSTGRES else "?"
-    conn = get_connection()
-    cursor = conn.cursor()
+    result = _api_cache_get("topics")
+    if result is not None:
+        return jsonify(result)
+
+    # One indexed GROUP BY over the junction table instead of a
+    # LIKE-scan of the articles table per topic
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT topic, COUNT(*) FROM article_topics GROUP BY topic")
+        counts = dict(cursor.fetchall())
+
     result = []
     for topic_name, meta in TOPIC_META.items():
-        cursor.execute(
-            f"SELECT COUNT(*) FROM articles WHERE topics LIKE {ph}",
-            [f"%{topic_name}%"]
-        )
-        count = cursor.fetchone()[0]
         result.append({
             "name":  topic_name,
-            "count": count,
+            "count": counts.get(topic_name, 0),
             "icon":  meta["icon"],
             "color": meta["color"],
         })
-    conn.close()
     result.sort(key=lambda x: x["count"], reverse=True)
+    _api_cache_set("topics", result)
     return jsonify(result)
 
 
@@ -198,36 +370,40 @@ def topics():
 def stats():
     ph = "%s" if USE_POSTGRES else "?"
     locale = request.args.get("locale", "en")
-    conn   = get_connection()
-    cursor = conn.cursor()
 
-    cursor.execute(f"SELECT COUNT(*) FROM articles WHERE locale = {ph}", [locale])
-    total = cursor.fetchone()[0]
+    cached = _api_cache_get(("stats", locale))
+    if cached is not None:
+        return jsonify(cached)
 
-    cursor.execute(
-        f"SELECT COUNT(*) FROM articles WHERE locale = {ph} AND tags LIKE {ph}",
-        [locale, "%lgbtqia+%"]
-    )
-    lgbtq = cursor.fetchone()[0]
-
-    cursor.execute(
-        f"SELECT COUNT(*) FROM articles WHERE locale = {ph} AND tags LIKE {ph}",
-        [locale, "%women%"]
-    )
-    women = cursor.fetchone()[0]
+    with db_connection() as conn:
+        cursor = conn.cursor()
 
-    cursor.execute(
-        f"SELECT MAX(scraped_at) FROM articles WHERE locale = {ph}", [locale]
-    )
-    last_scraped = cursor.fetchone()[0]
-
-    conn.close()
-    return jsonify({
-        "total":        total,
-        "lgbtqia_plus": lgbtq,
-        "women":        women,
+        # Single-row read from the materialized table the scraper maintains
+        cursor.execute(
+            f"SELECT total, lgbtq, women, last_scraped FROM article_stats"
+            f" WHERE locale = {ph}",
+            [locale]
+        )
+        row = cursor.fetchone()
+        if row:
+            total, lgbtq, women, last_scraped = row
+        else:
+            # No stats row yet (empty DB or pre-refresh) — aggregate once
+            cursor.execute(
+                f"""SELECT COUNT(*),
+                           SUM(CASE WHEN tags LIKE {ph} THEN 1 ELSE 0 END),
+                           SUM(CASE WHEN tags LIKE {ph} THEN 1 ELSE 0 END),
+                           MAX(scraped_at)
+                    FROM articles WHERE locale = {ph}""",
+                ["%lgbtqia+%", "%women%", locale]
+            )
+            total, lgbtq, women, last_scraped = cursor.fetchone()
+    return jsonify(_api_cache_set(("stats", locale), {
+        "total":        total or 0,
+        "lgbtqia_plus": lgbtq or 0,
+        "women":        women or 0,
         "last_scraped": last_scraped,
-    })
+    }))
 
 
 @app.route("/api/paywall-override", methods=["POST"])
@@ -249,25 +425,42 @@ def paywall_override():
     if article_id is None:
         return jsonify({"error": "Missing id"}), 400
 
-    ph     = "%s" if USE_POSTGRES else "?"
-    conn   = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        f"UPDATE articles SET paywall_override = {ph} WHERE id = {ph}",
-        (override, article_id)
-    )
-    conn.commit()
-    cursor.close()
-    conn.close()
+    ph = "%s" if USE_POSTGRES else "?"
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"UPDATE articles SET paywall_override = {ph} WHERE id = {ph}",
+            (override, article_id)
+        )
+        conn.commit()
+        cursor.close()
+
+    # This is the one mutating endpoint — cached listings would otherwise
+    # keep serving the old paywall flag for up to a TTL
+    clear_api_cache()
+    clear_articles_cache()
 
     return jsonify({"ok": True, "id": article_id, "paywall_override": override})
 
 
+# Single-flight guards — a burst of hits on the trigger endpoints (or an
+# overlap with the scheduler) must not launch N identical jobs
+_scrape_lock       = threading.Lock()
+_recategorize_lock = threading.Lock()
+
+
 @app.route("/api/scrape")
 def trigger_scrape():
     """Manually trigger a scrape (visit this URL to refresh articles)."""
+    if not _scrape_lock.acquire(blocking=False):
+        return jsonify({"status": "A scrape is already running."}), 202
+
     def do_scrape():
-        scrape_all_feeds()
+        try:
+            scrape_all_feeds()
+            clear_api_cache()
+        finally:
+            _scrape_lock.release()
     thread = threading.Thread(target=do_scrape)
     thread.start()
     return jsonify({"status": "Scraping started! Refresh in a few minutes."})
@@ -276,8 +469,15 @@ def trigger_scrape():
 @app.route("/api/recategorize")
 def trigger_recategorize():
     """Re-run topic detection on all existing articles using updated keyword rules."""
+    if not _recategorize_lock.acquire(blocking=False):
+        return jsonify({"status": "A recategorization is already running."}), 202
+
     def do_recategorize():
-        recategorize_all_articles()
+        try:
+            recategorize_all_articles()
+            clear_api_cache()
+        finally:
+            _recategorize_lock.release()
     thread = threading.Thread(target=do_recategorize)
     thread.start()
     return jsonify({"status": "Recategorization started! All existing articles will be updated with the new topic logic. Check Render logs for progress."})
@@ -295,19 +495,33 @@ def startup():
     setup_database()
 
     def initial_scrape():
+        if not _scrape_lock.acquire(blocking=False):
+            return
         try:
             print("🚀 Running initial scrape...", flush=True)
             scrape_all_feeds()
+            clear_api_cache()
             print("✅ Initial scrape complete!", flush=True)
         except Exception as e:
             print(f"❌ Initial scrape failed: {e}", flush=True)
+        finally:
+            _scrape_lock.release()
 
     thread = threading.Thread(target=initial_scrape)
     thread.start()
 
     scheduler = BackgroundScheduler()
+    def scheduled_scrape():
+        if not _scrape_lock.acquire(blocking=False):
+            return
+        try:
+            scrape_all_feeds()
+            clear_api_cache()
+        finally:
+            _scrape_lock.release()
+
     scheduler.add_job(
-        lambda: scrape_all_feeds(),
+        scheduled_scrape,
         "interval", hours=12,
         id="scheduled_scrape"
     )